@@ -5,11 +5,128 @@ Generates features, requirements, and project specifications
 """
 
 import os
-import json
-import random
+import functools
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+_FEATURE_TYPES = (
+    "web_application", "mobile_app", "api_service",
+    "cli_tool", "data_pipeline", "automation_script"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _rng():
+    """Module RNG, created on first use so `random` stays off the import path"""
+    import random
+    return random.Random()
+
+
+@functools.lru_cache(maxsize=None)
+def _json_dumps():
+    """Return an indented JSON-to-bytes serializer, using orjson when installed"""
+    try:
+        import orjson
+    except ImportError:
+        import json
+        return lambda obj: json.dumps(obj, indent=2).encode('utf-8')
+    return lambda obj: orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+
+# User stories; "{title}" in an action is filled from the spec
+_USER_STORY_TEMPLATES = (
+    # MVP stories
+    {
+        "id": "US-001",
+        "role": "As a user",
+        "action": "I want to access {title}",
+        "benefit": "So that I can use the core functionality",
+        "priority": "high",
+        "story_points": 3
+    },
+    {
+        "id": "US-002",
+        "role": "As a user",
+        "action": "I want to create an account",
+        "benefit": "So that I can save my data",
+        "priority": "high",
+        "story_points": 5
+    },
+    {
+        "id": "US-003",
+        "role": "As a user",
+        "action": "I want to manage my content",
+        "benefit": "So that I can organize my work",
+        "priority": "high",
+        "story_points": 5
+    },
+    {
+        "id": "US-004",
+        "role": "As an admin",
+        "action": "I want to view user analytics",
+        "benefit": "So that I can understand usage patterns",
+        "priority": "medium",
+        "story_points": 8
+    },
+    # V2 stories
+    {
+        "id": "US-005",
+        "role": "As a user",
+        "action": "I want to export my data",
+        "benefit": "So that I can use it elsewhere",
+        "priority": "low",
+        "story_points": 3
+    },
+    {
+        "id": "US-006",
+        "role": "As a user",
+        "action": "I want to receive notifications",
+        "benefit": "So that I stay updated",
+        "priority": "low",
+        "story_points": 5
+    },
+)
+
+# Acceptance criteria keyed on the first keyword found in a story's action
+_CRITERIA_TABLE = {
+    "account": (
+        "User can register with email/password",
+        "User can login with credentials",
+        "User can logout",
+        "Password must be at least 8 characters",
+        "User receives confirmation email"
+    ),
+    "manage": (
+        "User can create new items",
+        "User can read/view items",
+        "User can update items",
+        "User can delete items",
+        "Changes persist after refresh"
+    ),
+    "analytics": (
+        "Dashboard displays user count",
+        "Charts show activity over time",
+        "Data updates in real-time",
+        "Export function works"
+    ),
+}
+_DEFAULT_CRITERIA = (
+    "Feature is accessible from main navigation",
+    "Feature works on desktop and mobile",
+    "Response time is under 2 seconds",
+    "Error handling is implemented"
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_config_file(path, mtime_ns):
+    """Parse a .env file; cached on (path, mtime_ns) so edits invalidate it"""
+    text = Path(path).read_text(encoding='utf-8')
+    pairs = (ln.split('=', 1) for ln in text.splitlines()
+             if '=' in ln and not ln.lstrip().startswith('#'))
+    return {k.strip(): v.strip().strip('"') for k, v in pairs}
 
 class PMAgent:
     """Product Manager Agent - comes up with features and requirements"""
@@ -18,15 +135,18 @@ class PMAgent:
         self.config = self._load_config(config_path)
         self.projects_dir = Path("projects")
         self.projects_dir.mkdir(exist_ok=True)
+        self._feat_counter = self._count_features()
+        self._date_prefix = None
+        self._date_day = -1
         
     def _load_config(self, path):
-        config = {}
-        if os.path.exists(path):
-            with open(path) as f:
-                for line in f:
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.strip().split('=', 1)
-                        config[key] = value.strip('"')
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            config = {}
+        else:
+            # Copy so env overrides below never leak into the cached dict
+            config = _read_config_file(path, mtime_ns).copy()
         for key in ['OPENAI_API_KEY', 'ANTHROPIC_API_KEY']:
             if os.environ.get(key):
                 config[key] = os.environ.get(key)
@@ -54,7 +174,7 @@ class PMAgent:
         stories = self._generate_user_stories(spec)
         
         # Generate acceptance criteria
-        criteria = self._generate_acceptance_criteria(spec, stories)
+        criteria, criteria_count = self._generate_acceptance_criteria(spec, stories)
         
         # Generate technical requirements
         tech_reqs = self._generate_technical_requirements(spec, tech_stack)
@@ -84,31 +204,52 @@ class PMAgent:
         
         print(f"✅ PM Agent: Feature {feature_id} specified")
         print(f"   📋 {len(stories)} user stories")
-        print(f"   ✅ {sum(len(s['criteria']) for s in criteria.values())} acceptance criteria")
+        print(f"   ✅ {criteria_count} acceptance criteria")
         print(f"   🔧 {len(tech_reqs)} technical requirements")
         
         return feature_data
     
+    def generate_features(self, ideas: List[str], tech_stack: Optional[str] = None) -> List[Dict]:
+        """
+        Generate feature specifications for a batch of ideas
+        
+        Args:
+            ideas: High-level descriptions, one feature per entry
+            tech_stack: Optional tech preferences shared by every feature
+        """
+        return [self.generate_feature(idea, tech_stack) for idea in ideas]
+    
     def _generate_feature_id(self):
         """Generate unique feature ID"""
-        timestamp = datetime.now().strftime("%Y%m%d")
-        existing = len(list(self.projects_dir.glob("feat_*")))
-        return f"feat_{timestamp}_{existing + 1:04d}"
+        today = datetime.now()
+        day = today.toordinal()
+        if day != self._date_day:
+            # strftime is comparatively slow; the prefix only changes at midnight
+            self._date_prefix = today.strftime("%Y%m%d")
+            self._date_day = day
+        timestamp = self._date_prefix
+        while True:
+            self._feat_counter += 1
+            feature_id = f"feat_{timestamp}_{self._feat_counter:04d}"
+            # Skip ids taken by another process or left past a numbering gap
+            if not (self.projects_dir / feature_id).exists():
+                return feature_id
+    
+    def _count_features(self) -> int:
+        """Count existing feature directories"""
+        # scandir skips glob's per-entry Path construction and fnmatch
+        with os.scandir(self.projects_dir) as entries:
+            return sum(1 for e in entries if e.name.startswith("feat_"))
     
     def _create_feature_spec(self, idea: str, tech_stack: Optional[str]) -> Dict:
         """Create detailed feature specification"""
         # In production: Call Claude/GPT to analyze and expand the idea
         # For now, template-based generation
         
-        feature_types = [
-            "web_application", "mobile_app", "api_service", 
-            "cli_tool", "data_pipeline", "automation_script"
-        ]
-        
         return {
             "title": idea,
             "description": f"A comprehensive solution for {idea}",
-            "type": random.choice(feature_types),
+            "type": _rng().choice(_FEATURE_TYPES),
             "tech_stack": tech_stack or "Modern web stack (TBD by Dev team)",
             "mvp_features": [
                 f"Core {idea} functionality",
@@ -133,109 +274,31 @@ class PMAgent:
     def _generate_user_stories(self, spec: Dict) -> List[Dict]:
         """Generate user stories from spec"""
         stories = []
-        
-        # MVP stories
-        stories.extend([
-            {
-                "id": "US-001",
-                "role": "As a user",
-                "action": f"I want to access {spec['title']}",
-                "benefit": "So that I can use the core functionality",
-                "priority": "high",
-                "story_points": 3
-            },
-            {
-                "id": "US-002",
-                "role": "As a user",
-                "action": "I want to create an account",
-                "benefit": "So that I can save my data",
-                "priority": "high",
-                "story_points": 5
-            },
-            {
-                "id": "US-003",
-                "role": "As a user",
-                "action": "I want to manage my content",
-                "benefit": "So that I can organize my work",
-                "priority": "high",
-                "story_points": 5
-            },
-            {
-                "id": "US-004",
-                "role": "As an admin",
-                "action": "I want to view user analytics",
-                "benefit": "So that I can understand usage patterns",
-                "priority": "medium",
-                "story_points": 8
-            }
-        ])
-        
-        # Add V2 stories
-        stories.extend([
-            {
-                "id": "US-005",
-                "role": "As a user",
-                "action": "I want to export my data",
-                "benefit": "So that I can use it elsewhere",
-                "priority": "low",
-                "story_points": 3
-            },
-            {
-                "id": "US-006",
-                "role": "As a user",
-                "action": "I want to receive notifications",
-                "benefit": "So that I stay updated",
-                "priority": "low",
-                "story_points": 5
-            }
-        ])
+        for template in _USER_STORY_TEMPLATES:
+            story = dict(template)
+            if "{title}" in story["action"]:
+                story["action"] = story["action"].format(title=spec['title'])
+            stories.append(story)
         
         return stories
     
-    def _generate_acceptance_criteria(self, spec: Dict, stories: List[Dict]) -> Dict:
-        """Generate acceptance criteria for each story"""
+    def _generate_acceptance_criteria(self, spec: Dict, stories: List[Dict]) -> Tuple[Dict, int]:
+        """Generate acceptance criteria for each story, plus their total count"""
         criteria = {}
+        total = 0
         
         for story in stories:
-            story_criteria = []
-            
-            if "account" in story['action'].lower():
-                story_criteria = [
-                    "User can register with email/password",
-                    "User can login with credentials",
-                    "User can logout",
-                    "Password must be at least 8 characters",
-                    "User receives confirmation email"
-                ]
-            elif "manage" in story['action'].lower():
-                story_criteria = [
-                    "User can create new items",
-                    "User can read/view items",
-                    "User can update items",
-                    "User can delete items",
-                    "Changes persist after refresh"
-                ]
-            elif "analytics" in story['action'].lower():
-                story_criteria = [
-                    "Dashboard displays user count",
-                    "Charts show activity over time",
-                    "Data updates in real-time",
-                    "Export function works"
-                ]
-            else:
-                story_criteria = [
-                    "Feature is accessible from main navigation",
-                    "Feature works on desktop and mobile",
-                    "Response time is under 2 seconds",
-                    "Error handling is implemented"
-                ]
+            action = story['action'].lower()
+            story_criteria = next((v for k, v in _CRITERIA_TABLE.items() if k in action),
+                                  _DEFAULT_CRITERIA)
             
             criteria[story['id']] = {
                 "story": story['action'],
-                "criteria": story_criteria
+                "criteria": list(story_criteria)
             }
+            total += len(story_criteria)
         
-        return criteria
+        return criteria, total
     
     def _generate_technical_requirements(self, spec: Dict, tech_stack: Optional[str]) -> List[Dict]:
         """Generate technical requirements"""
@@ -383,19 +446,21 @@ class PMAgent:
     
     def _save_feature(self, feature_dir: Path, feature_data: Dict):
         """Save feature specification to disk"""
+        # Serialize up front so each file is a single write
+        blob = _json_dumps()(feature_data)
+        readme = self._generate_readme(feature_data)
+        
         # Main metadata
-        with open(feature_dir / "feature_spec.json", 'w') as f:
-            json.dump(feature_data, f, indent=2)
+        (feature_dir / "feature_spec.json").write_bytes(blob)
         
         # Human-readable spec
-        with open(feature_dir / "README.md", 'w') as f:
-            f.write(self._generate_readme(feature_data))
+        (feature_dir / "README.md").write_text(readme)
     
     def _generate_readme(self, data: Dict) -> str:
         """Generate human-readable README"""
         spec = data['specification']
         
-        readme = f"""# {spec['title']}
+        parts = [f"""# {spec['title']}
 
 ## Description
 {spec['description']}
@@ -404,43 +469,42 @@ class PMAgent:
 {spec['tech_stack']}
 
 ## MVP Features
-"""
-        for feat in spec['mvp_features']:
-            readme += f"- {feat}\n"
-        
-        readme += "\n## User Stories\n\n"
-        for story in data['user_stories'][:4]:  # Show MVP stories
-            readme += f"### {story['id']} ({story['priority'].upper()})\n"
-            readme += f"\n**{story['role']},** {story['action']}\n"
-            readme += f"*{story['benefit']}*\n\n"
-            readme += f"**Story Points:** {story['story_points']}\n\n"
+"""]
+        parts.extend(f"- {feat}\n" for feat in spec['mvp_features'])
+        
+        parts.append("\n## User Stories\n\n")
+        for story in islice(data['user_stories'], 4):  # Show MVP stories
+            parts.append(f"### {story['id']} ({story['priority'].upper()})\n")
+            parts.append(f"\n**{story['role']},** {story['action']}\n")
+            parts.append(f"*{story['benefit']}*\n\n")
+            parts.append(f"**Story Points:** {story['story_points']}\n\n")
             
             # Add acceptance criteria
             if story['id'] in data['acceptance_criteria']:
-                readme += "**Acceptance Criteria:**\n"
-                for criteria in data['acceptance_criteria'][story['id']]['criteria']:
-                    readme += f"- [ ] {criteria}\n"
-                readme += "\n"
+                parts.append("**Acceptance Criteria:**\n")
+                parts.extend(f"- [ ] {criteria}\n"
+                             for criteria in data['acceptance_criteria'][story['id']]['criteria'])
+                parts.append("\n")
         
-        readme += "\n## API Endpoints\n\n"
+        parts.append("\n## API Endpoints\n\n")
         for endpoint in data['api_specification']['endpoints']:
-            readme += f"### {endpoint['method']} {endpoint['path']}\n"
-            readme += f"{endpoint['description']}\n\n"
+            parts.append(f"### {endpoint['method']} {endpoint['path']}\n")
+            parts.append(f"{endpoint['description']}\n\n")
         
-        readme += "\n## Status\n"
-        readme += f"- Current Status: {data['status']}\n"
-        readme += f"- Created: {data['created_at']}\n"
-        readme += "- Next Step: Awaiting development\n"
+        parts.append("\n## Status\n")
+        parts.append(f"- Current Status: {data['status']}\n")
+        parts.append(f"- Created: {data['created_at']}\n")
+        parts.append("- Next Step: Awaiting development\n")
         
-        return readme
+        return "".join(parts)
 
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) < 2:
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
         print("Usage: python3 pm_agent.py 'Your feature idea' [tech_stack]")
         print("Example: python3 pm_agent.py 'Task management app' 'React, Node.js'")
-        sys.exit(1)
+        sys.exit(0 if len(sys.argv) > 1 else 1)
     
     idea = sys.argv[1]
     tech_stack = sys.argv[2] if len(sys.argv) > 2 else None